@@ -0,0 +1,96 @@
+"""Numba-compiled byte writer for test_data, imported on first use."""
+
+import numpy as np
+from numba import njit
+
+from test_data import _ENTITY, _P_CATEGORY, _P_LABEL, _P_RELATED, _P_TYPE, _P_VALUE, _XSD_INT_SUFFIX
+
+
+def _as_array(fragment: str) -> np.ndarray:
+    """View an ASCII fragment as a uint8 array."""
+    return np.frombuffer(fragment.encode("ascii"), dtype=np.uint8)
+
+
+_FRAGMENTS = tuple(
+    _as_array(fragment)
+    for fragment in (_ENTITY, _P_TYPE, _P_LABEL, _P_VALUE, _XSD_INT_SUFFIX, _P_CATEGORY, _P_RELATED, '" .', "> .")
+)
+
+
+@njit(cache=True)
+def _put(buf: np.ndarray, pos: int, fragment: np.ndarray) -> int:
+    """Copy fragment into buf at pos and return the new position."""
+    for k in range(fragment.size):
+        buf[pos + k] = fragment[k]
+    return pos + fragment.size
+
+
+@njit(cache=True)
+def _put_int(buf: np.ndarray, pos: int, value: int) -> int:
+    """Write the decimal digits of a non-negative value into buf at pos."""
+    digits = 1
+    rest = value // 10
+    while rest > 0:
+        rest //= 10
+        digits += 1
+    end = pos + digits
+    for k in range(end - 1, pos - 1, -1):
+        buf[k] = 48 + value % 10
+        value //= 10
+    return end
+
+
+@njit(cache=True)
+def _fill_triples(
+    buf: np.ndarray,
+    num_entities: int,
+    start: int,
+    sep: int,
+    entity: np.ndarray,
+    p_type: np.ndarray,
+    p_label: np.ndarray,
+    p_value: np.ndarray,
+    xsd_int: np.ndarray,
+    p_category: np.ndarray,
+    p_related: np.ndarray,
+    close_literal: np.ndarray,
+    close_iri: np.ndarray,
+) -> int:
+    """Write the same triples as test_data._write_triples as ASCII into buf and return the length."""
+    pos = 0
+    for i in range(start, start + num_entities):
+        if i > start:
+            buf[pos] = sep
+            pos += 1
+        pos = _put_int(buf, _put(buf, pos, entity), i)
+        pos = _put(buf, pos, p_type)
+        buf[pos] = sep
+        pos = _put_int(buf, _put(buf, pos + 1, entity), i)
+        pos = _put_int(buf, _put(buf, pos, p_label), i)
+        pos = _put(buf, pos, close_literal)
+        buf[pos] = sep
+        pos = _put_int(buf, _put(buf, pos + 1, entity), i)
+        pos = _put_int(buf, _put(buf, pos, p_value), i)
+        pos = _put(buf, pos, xsd_int)
+        buf[pos] = sep
+        pos = _put_int(buf, _put(buf, pos + 1, entity), i)
+        pos = _put_int(buf, _put(buf, pos, p_category), i % 10)
+        pos = _put(buf, pos, close_iri)
+        if i > 0:
+            buf[pos] = sep
+            pos = _put_int(buf, _put(buf, pos + 1, entity), i)
+            pos = _put_int(buf, _put(buf, pos, p_related), i - 1)
+            pos = _put(buf, pos, close_iri)
+    return pos
+
+
+def triples_bytes(num_entities: int, start: int = 0, sep: str = "\n") -> bytes:
+    """Compiled equivalent of test_data._write_triples, as ASCII bytes."""
+    # Upper bound per entity: every fragment once, plus 4 more subjects and a second "> .",
+    # 9 integers of at most `digits` digits and 5 separators. _fill_triples does no bounds checks.
+    digits = len(str(start + num_entities))
+    per_entity = sum(fragment.size for fragment in _FRAGMENTS) + 4 * _FRAGMENTS[0].size + _FRAGMENTS[-1].size + 9 * digits + 5
+    out = np.empty(per_entity * num_entities, dtype=np.uint8)
+    length = _fill_triples(out, num_entities, start, ord(sep), *_FRAGMENTS)
+    assert length <= out.size, "triple buffer overrun"
+    return out[:length].tobytes()
@@ -1,43 +1,93 @@
 import asyncio
-import csv
-import random
+import dataclasses
+import functools
+import os
 import subprocess
 import sys
-import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import BinaryIO
+from urllib.parse import urlencode
 
 import httpx
+import numpy as np
+import polars as pl
+import uvloop
 
 from factory import (
     ASYNC_PACKAGES,
     SYNC_PACKAGES,
+    FORM_QUERY_HEADERS,
+    AsyncSPARQLPackage,
+    SPARQLPackage,
+    check_keep_alive,
     run_async_package,
     run_sync_package,
 )
 from model import BenchmarkResult
 from queries import QUERIES, UPDATES
-from setup_virtuoso import get_sparql_endpoint, setup_virtuoso, stop_virtuoso
-from test_data import generate_insert_sparql
+from setup_virtuoso import USE_STUB_ENV, get_sparql_endpoint, setup_virtuoso, stop_virtuoso
+from stub_server import capture_responses, start_stub, stop_stub
+from test_data import BASE, generate_insert_sparql
 
-NUM_RUNS = 11
+NUM_RUNS = 10
+RANDOM_SEED = 42
 ITERATIONS_PER_QUERY = 50
+ASYNC_CONCURRENCY = 10
+MAX_WORKERS = 1
 RESULTS_FILE = "benchmark_results.csv"
+STUB_RESULTS_FILE = "benchmark_results_stub.csv"
+USE_STUB = False
+TEST_DATA_ENTITIES = 1000
+TEST_DATA_BATCH_SIZE = 100
+
+_client: httpx.Client | None = None
+
+
+def _get_client() -> httpx.Client:
+    """Return the shared client used for data loading, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = httpx.Client(http2=True, timeout=60.0)
+    return _client
+
+
+@functools.cache
+def _insert_bodies(total_entities: int, batch_size: int) -> tuple[bytes, ...]:
+    """Pre-encoded SPARQL INSERT DATA bodies covering `total_entities` in batches."""
+    return tuple(
+        generate_insert_sparql(batch_size, start).encode()
+        for start in range(0, total_entities, batch_size)
+    )
+
+
+def _test_data_loaded(client: httpx.Client, endpoint: str) -> bool:
+    """Check whether the last test entity is already in the store."""
+    ask = f"ASK {{ <{BASE}entity/{TEST_DATA_ENTITIES - 1}> ?p ?o }}"
+    response = client.post(
+        endpoint,
+        content=urlencode({"query": ask}).encode(),
+        headers=FORM_QUERY_HEADERS,
+    )
+    response.raise_for_status()
+    return response.json()["boolean"]
 
 
 def load_test_data() -> None:
-    """Load test data into Virtuoso via SPARQL INSERT in batches."""
+    """Load test data into Virtuoso via SPARQL INSERT in batches, unless already present."""
     endpoint = get_sparql_endpoint()
-    batch_size = 100
-    total_entities = 1000
-
-    with httpx.Client(timeout=60.0) as client:
-        for start in range(0, total_entities, batch_size):
-            insert_query = generate_insert_sparql(batch_size, start)
-            response = client.post(
-                endpoint,
-                content=insert_query,
-                headers={"Content-Type": "application/sparql-update"},
-            )
-            response.raise_for_status()
+    client = _get_client()
+
+    if _test_data_loaded(client, endpoint):
+        print("Test data already loaded")
+        return
+
+    for body in _insert_bodies(TEST_DATA_ENTITIES, TEST_DATA_BATCH_SIZE):
+        response = client.post(
+            endpoint,
+            content=body,
+            headers={"Content-Type": "application/sparql-update"},
+        )
+        response.raise_for_status()
 
     print("Test data loaded successfully")
 
@@ -46,139 +96,200 @@ def calculate_result(
     library: str,
     operation: str,
     query_name: str,
-    results: list[tuple[bytes | None, float]],
+    body: bytes | None,
+    times: np.ndarray,
+    offsets: np.ndarray,
+    successes: int,
 ) -> BenchmarkResult:
-    """Calculate benchmark metrics from raw results."""
-    times = [r[1] for r in results]
-    total_time = sum(times)
-    successful = len([r for r in results if r is not None or operation in ("INSERT", "DELETE", "UPDATE")])
-    response_size = len(results[0][0]) if results[0][0] else 0
+    """Calculate benchmark metrics from raw results.
+
+    `times` and `offsets` are integer nanoseconds, converted to seconds
+    here. Throughput uses the wall-clock span of the batch, so concurrent
+    requests are not double counted.
+    """
+    num_requests = times.size
+    total_time = int((offsets + times).max() - offsets.min()) * 1e-9
 
     return BenchmarkResult(
         library=library,
         operation=operation,
         query_name=query_name,
-        requests_per_sec=len(results) / total_time,
+        requests_per_sec=num_requests / total_time,
         total_time=total_time,
-        avg_request_time=total_time / len(results),
-        response_size_bytes=response_size,
-        success_rate=successful / len(results),
+        avg_request_time=int(times.sum()) * 1e-9 / num_requests,
+        response_size_bytes=len(body) if body else 0,
+        success_rate=successes / num_requests,
     )
 
 
-def run_benchmark() -> list[BenchmarkResult]:
-    """Run the complete benchmark suite."""
-    all_results = []
-
-    for run in range(NUM_RUNS):
-        print(f"\nBenchmark run: {run + 1}/{NUM_RUNS}")
-
-        if run == 0:
-            print("  (warmup run - results discarded)")
-
-        sync_packages = list(SYNC_PACKAGES)
-        async_packages = list(ASYNC_PACKAGES)
-        random.shuffle(sync_packages)
-        random.shuffle(async_packages)
-
-        for package_class in sync_packages:
-            print(f"  Running {package_class.name}...")
-
-            for query_name, query_info in QUERIES.items():
-                is_construct = query_info["operation"] == "CONSTRUCT"
-                results = run_sync_package(
-                    package_class,
-                    query_info["sparql"],
-                    is_construct=is_construct,
-                    iterations=ITERATIONS_PER_QUERY,
-                )
-                if run > 0:
-                    all_results.append(calculate_result(
-                        package_class.name,
-                        query_info["operation"],
-                        query_name,
-                        results,
-                    ))
-
-            for update_name, update_info in UPDATES.items():
-                results = run_sync_package(
-                    package_class,
-                    update_info["sparql"],
-                    is_update=True,
-                    iterations=ITERATIONS_PER_QUERY,
-                )
-                if run > 0:
-                    all_results.append(calculate_result(
-                        package_class.name,
-                        update_info["operation"],
-                        update_name,
-                        results,
-                    ))
-
-        for package_class in async_packages:
-            print(f"  Running {package_class.name}...")
+def warmup(package: SPARQLPackage) -> None:
+    """Send every query and update once so lazy client initialization happens before timing."""
+    for query_info in QUERIES.values():
+        is_construct = query_info["operation"] == "CONSTRUCT"
+        run_sync_package(package, query_info["form_body"], is_construct=is_construct, iterations=1)
+    for update_info in UPDATES.values():
+        run_sync_package(package, update_info["sparql_bytes"], is_update=True, iterations=1)
+
+
+async def warmup_async(package: AsyncSPARQLPackage) -> None:
+    """Send every query and update once so lazy client initialization happens before timing."""
+    for query_info in QUERIES.values():
+        is_construct = query_info["operation"] == "CONSTRUCT"
+        await run_async_package(package, query_info["form_body"], is_construct=is_construct, iterations=1)
+    for update_info in UPDATES.values():
+        await run_async_package(package, update_info["sparql_bytes"], is_update=True, iterations=1)
+
+
+def _benchmark_sync(package_class: type[SPARQLPackage]) -> list[BenchmarkResult]:
+    """Run all queries and updates against one sync package."""
+    results = []
+    package = package_class()
+    package.setup()
+    try:
+        warmup(package)
+
+        for query_name, query_info in QUERIES.items():
+            is_construct = query_info["operation"] == "CONSTRUCT"
+            samples = run_sync_package(
+                package,
+                query_info["form_body"],
+                is_construct=is_construct,
+                iterations=ITERATIONS_PER_QUERY,
+            )
+            results.append(calculate_result(
+                package_class.name,
+                query_info["operation"],
+                query_name,
+                *samples,
+            ))
+
+        for update_name, update_info in UPDATES.items():
+            samples = run_sync_package(
+                package,
+                update_info["sparql_bytes"],
+                is_update=True,
+                iterations=ITERATIONS_PER_QUERY,
+            )
+            results.append(calculate_result(
+                package_class.name,
+                update_info["operation"],
+                update_name,
+                *samples,
+            ))
+    finally:
+        package.teardown()
+
+    return results
+
+
+def _benchmark_async(package_class: type[AsyncSPARQLPackage]) -> list[BenchmarkResult]:
+    """Run all queries and updates against one async package on a single uvloop event loop."""
+    results = []
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+        package = package_class()
+        runner.run(package.setup())
+        try:
+            runner.run(warmup_async(package))
 
             for query_name, query_info in QUERIES.items():
                 is_construct = query_info["operation"] == "CONSTRUCT"
-                results = asyncio.run(run_async_package(
-                    package_class,
-                    query_info["sparql"],
+                samples = runner.run(run_async_package(
+                    package,
+                    query_info["form_body"],
                     is_construct=is_construct,
                     iterations=ITERATIONS_PER_QUERY,
+                    concurrency=ASYNC_CONCURRENCY,
+                ))
+                results.append(calculate_result(
+                    package_class.name,
+                    query_info["operation"],
+                    query_name,
+                    *samples,
                 ))
-                if run > 0:
-                    all_results.append(calculate_result(
-                        package_class.name,
-                        query_info["operation"],
-                        query_name,
-                        results,
-                    ))
 
             for update_name, update_info in UPDATES.items():
-                results = asyncio.run(run_async_package(
-                    package_class,
-                    update_info["sparql"],
+                samples = runner.run(run_async_package(
+                    package,
+                    update_info["sparql_bytes"],
                     is_update=True,
                     iterations=ITERATIONS_PER_QUERY,
+                    concurrency=ASYNC_CONCURRENCY,
+                ))
+                results.append(calculate_result(
+                    package_class.name,
+                    update_info["operation"],
+                    update_name,
+                    *samples,
                 ))
-                if run > 0:
-                    all_results.append(calculate_result(
-                        package_class.name,
-                        update_info["operation"],
-                        update_name,
-                        results,
-                    ))
-
-    return all_results
-
-
-def save_results(results: list[BenchmarkResult]) -> None:
-    """Save benchmark results to CSV."""
-    with open(RESULTS_FILE, "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            "library",
-            "operation",
-            "query_name",
-            "requests_per_sec",
-            "total_time",
-            "avg_request_time",
-            "response_size_bytes",
-            "success_rate",
-        ])
-        for result in results:
-            writer.writerow([
-                result.library,
-                result.operation,
-                result.query_name,
-                result.requests_per_sec,
-                result.total_time,
-                result.avg_request_time,
-                result.response_size_bytes,
-                result.success_rate,
-            ])
-
-    print(f"\nResults saved to {RESULTS_FILE}")
+        finally:
+            runner.run(package.teardown())
+
+    return results
+
+
+def benchmark_one(run_idx: int, package_class: type, is_async: bool) -> list[BenchmarkResult]:
+    """Benchmark one package for one run. Executed in a worker process."""
+    print(f"  Run {run_idx + 1}/{NUM_RUNS}: running {package_class.name}...")
+    if is_async:
+        return _benchmark_async(package_class)
+    return _benchmark_sync(package_class)
+
+
+def _package_orders(rng: np.random.Generator) -> list[list[tuple[type, bool]]]:
+    """Precompute the (package_class, is_async) order of every run, sync packages first."""
+    orders = []
+    for _ in range(NUM_RUNS):
+        sync_order = rng.permutation(len(SYNC_PACKAGES))
+        async_order = rng.permutation(len(ASYNC_PACKAGES))
+        orders.append(
+            [(SYNC_PACKAGES[i], False) for i in sync_order]
+            + [(ASYNC_PACKAGES[i], True) for i in async_order]
+        )
+    return orders
+
+
+def run_benchmark(results_file: BinaryIO) -> None:
+    """Run the complete benchmark suite, appending each package's results to CSV as they complete.
+
+    (run, package) pairs are independent and are sharded over MAX_WORKERS
+    processes. They all hit the same Virtuoso instance, so more than one
+    worker trades measurement isolation for wall-clock time.
+    """
+    header_written = False
+    orders = _package_orders(np.random.default_rng(RANDOM_SEED))
+    check_keep_alive()
+
+    with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = [
+            executor.submit(benchmark_one, run, package_class, is_async)
+            for run, order in enumerate(orders)
+            for package_class, is_async in order
+        ]
+        for future in as_completed(futures):
+            frame = pl.DataFrame([dataclasses.asdict(result) for result in future.result()])
+            frame.write_csv(results_file, include_header=not header_written)
+            header_written = True
+            results_file.flush()
+
+
+def run_and_save_results(path: str = RESULTS_FILE) -> None:
+    """Run the benchmark, writing results incrementally to `path`."""
+    with open(path, "wb") as f:
+        run_benchmark(f)
+
+    print(f"\nResults saved to {path}")
+
+
+def run_stub_benchmark() -> None:
+    """Rerun the benchmark against a stub serving cached responses, isolating client overhead."""
+    responses = capture_responses(get_sparql_endpoint())
+    process = start_stub(responses)
+    os.environ[USE_STUB_ENV] = "1"
+    try:
+        run_and_save_results(STUB_RESULTS_FILE)
+    finally:
+        del os.environ[USE_STUB_ENV]
+        stop_stub(process)
 
 
 def generate_analytics() -> None:
@@ -197,10 +308,11 @@ def main() -> None:
     load_test_data()
 
     print("\nStarting benchmark...")
-    results = run_benchmark()
+    run_and_save_results()
 
-    print("\nSaving results...")
-    save_results(results)
+    if USE_STUB:
+        print("\nStarting client-overhead benchmark against the stub endpoint...")
+        run_stub_benchmark()
 
     print("\nGenerating analytics...")
     generate_analytics()
@@ -214,8 +326,10 @@ def main() -> None:
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "--skip-setup":
         print("Skipping Virtuoso setup...")
-        results = run_benchmark()
-        save_results(results)
+        load_test_data()
+        run_and_save_results()
+        if USE_STUB:
+            run_stub_benchmark()
         generate_analytics()
     else:
         main()
@@ -1,25 +1,58 @@
+import os
+
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
+import polars as pl
 import seaborn as sns
+from numba import njit
 
 RESULTS_FILE = "benchmark_results.csv"
-
-
-def load_results() -> pd.DataFrame:
-    """Load benchmark results from CSV."""
-    return pd.read_csv(RESULTS_FILE)
-
-
-def plot_requests_per_second(df: pd.DataFrame) -> None:
+STUB_RESULTS_FILE = "benchmark_results_stub.csv"
+END_TO_END = "end-to-end"
+CLIENT_OVERHEAD = "client overhead"
+WRITE_OPERATIONS = ["INSERT", "DELETE", "UPDATE", "BATCH"]
+
+
+def load_results() -> pl.DataFrame:
+    """Load benchmark results from CSV, plus the stub run if present, tagged by `source`."""
+    frames = [pl.read_csv(RESULTS_FILE).with_columns(source=pl.lit(END_TO_END))]
+    if os.path.exists(STUB_RESULTS_FILE):
+        frames.append(pl.read_csv(STUB_RESULTS_FILE).with_columns(source=pl.lit(CLIENT_OVERHEAD)))
+    return pl.concat(frames)
+
+
+def _pivot_mean(df: pl.DataFrame, index: str, on: str, values: str = "requests_per_sec") -> pd.DataFrame:
+    """Mean of `values` per (index, on) pair, converted to pandas for plotting."""
+    pivot = df.pivot(on=on, index=index, values=values, aggregate_function="mean").sort(index)
+    columns = sorted(column for column in pivot.columns if column != index)
+    frame = pd.DataFrame(pivot.select(index, *columns).to_dict(as_series=False)).set_index(index)
+    return frame.rename_axis(columns=on)
+
+
+@njit(cache=True)
+def best_per_query(
+    q_codes: np.ndarray,
+    lib_codes: np.ndarray,
+    rps: np.ndarray,
+    n_queries: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return the best requests/sec and its library code for each query code, in one pass."""
+    best = np.full(n_queries, -np.inf)
+    best_lib = np.full(n_queries, -1, dtype=np.int32)
+    for i in range(q_codes.size):
+        q = q_codes[i]
+        if rps[i] > best[q]:
+            best[q] = rps[i]
+            best_lib[q] = lib_codes[i]
+    return best, best_lib
+
+
+def plot_requests_per_second(df: pl.DataFrame) -> None:
     """Plot requests per second by library and operation."""
     plt.figure(figsize=(14, 8))
 
-    pivot = df.pivot_table(
-        values="requests_per_sec",
-        index="query_name",
-        columns="library",
-        aggfunc="mean",
-    )
+    pivot = _pivot_mean(df, index="query_name", on="library")
 
     pivot.plot(kind="bar", ax=plt.gca())
     plt.title("Requests per second by query type")
@@ -32,13 +65,17 @@ def plot_requests_per_second(df: pd.DataFrame) -> None:
     plt.close()
 
 
-def plot_avg_request_time(df: pd.DataFrame) -> None:
+def plot_avg_request_time(df: pl.DataFrame) -> None:
     """Plot average request time by library."""
     plt.figure(figsize=(10, 6))
 
-    avg_times = df.groupby("library")["avg_request_time"].mean().sort_values()
+    avg_times = (
+        df.group_by("library")
+        .agg(pl.col("avg_request_time").mean())
+        .sort("avg_request_time")
+    )
 
-    sns.barplot(x=avg_times.index, y=avg_times.values)
+    sns.barplot(x=avg_times["library"].to_list(), y=avg_times["avg_request_time"].to_list())
     plt.title("Average request time by library")
     plt.xlabel("Library")
     plt.ylabel("Time (seconds)")
@@ -48,20 +85,17 @@ def plot_avg_request_time(df: pd.DataFrame) -> None:
     plt.close()
 
 
-def plot_by_operation_type(df: pd.DataFrame) -> None:
+def plot_by_operation_type(df: pl.DataFrame) -> None:
     """Plot performance grouped by operation type (read vs write)."""
     plt.figure(figsize=(12, 6))
 
-    df["op_type"] = df["operation"].apply(
-        lambda x: "write" if x in ("INSERT", "DELETE", "UPDATE") else "read"
+    df = df.with_columns(
+        op_type=pl.when(pl.col("operation").is_in(WRITE_OPERATIONS))
+        .then(pl.lit("write"))
+        .otherwise(pl.lit("read"))
     )
 
-    pivot = df.pivot_table(
-        values="requests_per_sec",
-        index="library",
-        columns="op_type",
-        aggfunc="mean",
-    )
+    pivot = _pivot_mean(df, index="library", on="op_type")
 
     pivot.plot(kind="bar", ax=plt.gca())
     plt.title("Requests per second: read vs write operations")
@@ -74,16 +108,11 @@ def plot_by_operation_type(df: pd.DataFrame) -> None:
     plt.close()
 
 
-def plot_heatmap(df: pd.DataFrame) -> None:
+def plot_heatmap(df: pl.DataFrame) -> None:
     """Plot heatmap of requests per second."""
     plt.figure(figsize=(12, 8))
 
-    pivot = df.pivot_table(
-        values="requests_per_sec",
-        index="query_name",
-        columns="library",
-        aggfunc="mean",
-    )
+    pivot = _pivot_mean(df, index="query_name", on="library")
 
     sns.heatmap(pivot, annot=True, fmt=".1f", cmap="YlGnBu")
     plt.title("Requests per second heatmap")
@@ -92,42 +121,93 @@ def plot_heatmap(df: pd.DataFrame) -> None:
     plt.close()
 
 
-def print_summary(df: pd.DataFrame) -> None:
+def plot_client_overhead(df: pl.DataFrame) -> None:
+    """Plot average request time by library, end-to-end vs against the stub endpoint."""
+    plt.figure(figsize=(10, 6))
+
+    pivot = _pivot_mean(df, index="library", on="source", values="avg_request_time") * 1000
+
+    pivot.plot(kind="bar", ax=plt.gca())
+    plt.title("Average request time: end-to-end vs client overhead")
+    plt.xlabel("Library")
+    plt.ylabel("Time (ms)")
+    plt.xticks(rotation=45, ha="right")
+    plt.legend(title="Measurement")
+    plt.tight_layout()
+    plt.savefig("client_overhead_by_library.png", dpi=150)
+    plt.close()
+
+
+def print_client_overhead(df: pl.DataFrame) -> None:
+    """Print end-to-end and client-overhead request times side by side."""
+    print("\nAverage request time (ms), end-to-end vs client overhead:")
+    print(
+        df.group_by("library", "source")
+        .agg((pl.col("avg_request_time").mean() * 1000).alias("avg_request_time_ms"))
+        .pivot(on="source", index="library", values="avg_request_time_ms")
+        .select("library", END_TO_END, CLIENT_OVERHEAD)
+        .with_columns(client_share=pl.col(CLIENT_OVERHEAD) / pl.col(END_TO_END))
+        .sort(END_TO_END)
+    )
+
+
+def print_summary(df: pl.DataFrame) -> None:
     """Print summary statistics."""
     print("\nSummary statistics")
     print("=" * 50)
 
     print("\nAverage requests/sec by library:")
-    print(df.groupby("library")["requests_per_sec"].mean().sort_values(ascending=False))
+    print(
+        df.group_by("library")
+        .agg(pl.col("requests_per_sec").mean())
+        .sort("requests_per_sec", descending=True)
+    )
 
     print("\nAverage request time (ms) by library:")
-    avg_ms = df.groupby("library")["avg_request_time"].mean() * 1000
-    print(avg_ms.sort_values())
+    print(
+        df.group_by("library")
+        .agg((pl.col("avg_request_time").mean() * 1000).alias("avg_request_time_ms"))
+        .sort("avg_request_time_ms")
+    )
 
     print("\nBest library by query type:")
-    for query_name in df["query_name"].unique():
-        query_df = df[df["query_name"] == query_name]
-        best = query_df.loc[query_df["requests_per_sec"].idxmax()]
-        print(f"  {query_name}: {best['library']} ({best['requests_per_sec']:.1f} req/s)")
+    query_names, q_codes = np.unique(df["query_name"].to_numpy(), return_inverse=True)
+    libraries, lib_codes = np.unique(df["library"].to_numpy(), return_inverse=True)
+    best, best_lib = best_per_query(
+        q_codes.astype(np.int32),
+        lib_codes.astype(np.int32),
+        df["requests_per_sec"].to_numpy().astype(np.float64),
+        len(query_names),
+    )
+    for query_name, rps, lib_code in zip(query_names, best, best_lib):
+        print(f"  {query_name}: {libraries[lib_code]} ({rps:.1f} req/s)")
 
 
 def main() -> None:
     print("Generating analytics...")
 
-    df = load_results()
+    results = load_results()
+    df = results.filter(pl.col("source") == END_TO_END)
+    has_stub = results["source"].n_unique() > 1
 
     plot_requests_per_second(df)
     plot_avg_request_time(df)
     plot_by_operation_type(df)
     plot_heatmap(df)
+    if has_stub:
+        plot_client_overhead(results)
 
     print_summary(df)
+    if has_stub:
+        print_client_overhead(results)
 
     print("\nCharts saved:")
     print("  - rps_by_query.png")
     print("  - avg_time_by_library.png")
     print("  - rps_read_vs_write.png")
     print("  - rps_heatmap.png")
+    if has_stub:
+        print("  - client_overhead_by_library.png")
 
 
 if __name__ == "__main__":
@@ -1,21 +1,70 @@
+import asyncio
+import socket
 import time
 from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import Awaitable, Callable
+from functools import partial
 from io import BytesIO
+from urllib.parse import urlencode
+
 import aiohttp
 import httpx
+import numpy as np
 import pycurl
 import requests
 import urllib3
+from requests.adapters import HTTPAdapter
 
 from setup_virtuoso import get_sparql_endpoint
 
 TIMEOUT_TOTAL = 30.0
 TIMEOUT_CONNECT = 5.0
 TIMEOUT_READ = 25.0
+CURL_MULTI_HANDLES = 10
+POOL_SIZE = 64
+HTTPX_LIMITS = httpx.Limits(max_keepalive_connections=POOL_SIZE, max_connections=POOL_SIZE)
+
+KEEP_ALIVE_HEADERS = {"Connection": "keep-alive"}
+QUERY_HEADERS = {**KEEP_ALIVE_HEADERS, "Accept": "application/sparql-results+json"}
+CONSTRUCT_HEADERS = {**KEEP_ALIVE_HEADERS, "Accept": "text/turtle"}
+UPDATE_HEADERS = {**KEEP_ALIVE_HEADERS, "Content-Type": "application/sparql-update"}
+FORM_CONTENT_TYPE = "application/x-www-form-urlencoded"
+FORM_QUERY_HEADERS = {**QUERY_HEADERS, "Content-Type": FORM_CONTENT_TYPE}
+FORM_CONSTRUCT_HEADERS = {**CONSTRUCT_HEADERS, "Content-Type": FORM_CONTENT_TYPE}
+
+# (response_body, elapsed_ns, start_offsets_ns, success_count) for one batch of iterations.
+PackageRun = tuple[bytes | None, np.ndarray, np.ndarray, int]
+# (status_code, response_body or None when discarded, elapsed_ns) for one query.
+QueryResult = tuple[int, bytes | None, int]
+# (status_code, elapsed_ns) for one update.
+UpdateResult = tuple[int, int]
+# A query specialized for one pre-encoded body; called with capture_body.
+CompiledQuery = Callable[[bool], QueryResult]
+AsyncCompiledQuery = Callable[[bool], Awaitable[QueryResult]]
+
+
+def prepare_query(sparql: str, is_construct: bool = False) -> tuple[bytes, dict[str, str]]:
+    """Pre-encode a SPARQL query as a form body. Returns (body, headers)."""
+    body = urlencode({"query": sparql}).encode()
+    return body, FORM_CONSTRUCT_HEADERS if is_construct else FORM_QUERY_HEADERS
+
+
+def check_keep_alive() -> None:
+    """Warn if the SPARQL endpoint does not keep connections alive."""
+    response = httpx.get(get_sparql_endpoint(), headers=KEEP_ALIVE_HEADERS, timeout=TIMEOUT_TOTAL)
+    connection = response.headers.get("Connection", "").lower()
+    if connection == "close" or (response.http_version == "HTTP/1.0" and connection != "keep-alive"):
+        print(f"  Warning: endpoint does not keep connections alive (Connection: {connection or 'unset'})")
 
-QUERY_HEADERS = {"Accept": "application/sparql-results+json"}
-CONSTRUCT_HEADERS = {"Accept": "text/turtle"}
-UPDATE_HEADERS = {"Content-Type": "application/sparql-update"}
+
+def is_success(status: int) -> bool:
+    """Return whether an HTTP status code denotes a successful request."""
+    return 200 <= status < 300
+
+
+def _discard_chunk(chunk: bytes) -> None:
+    """pycurl write callback that drops the received bytes."""
 
 
 class SPARQLPackage(ABC):
@@ -31,16 +80,53 @@ class SPARQLPackage(ABC):
     def teardown(self) -> None:
         pass
 
+    def query(self, sparql: str, is_construct: bool = False) -> tuple[bytes, int]:
+        """Execute SPARQL query. Returns (response_body, elapsed_ns)."""
+        _, content, elapsed_ns = self.query_prepared(*prepare_query(sparql, is_construct))
+        return content, elapsed_ns
+
+    def query_prepared(self, body: bytes, headers: dict[str, str], capture_body: bool = True) -> QueryResult:
+        """Execute a pre-encoded SPARQL query. Returns (status_code, response_body, elapsed_ns).
+
+        With capture_body=False the response is drained without being materialized and the body is None.
+        """
+        return self.compile_query(body, headers)(capture_body)
+
     @abstractmethod
-    def query(self, sparql: str, is_construct: bool = False) -> tuple[bytes, float]:
-        """Execute SPARQL query. Returns (response_body, elapsed_time)."""
+    def compile_query(self, body: bytes, headers: dict[str, str]) -> CompiledQuery:
+        """Specialize a query for repeated execution, pre-building the request once."""
         pass
 
     @abstractmethod
-    def update(self, sparql: str) -> float:
-        """Execute SPARQL update. Returns elapsed_time."""
+    def update(self, body: bytes) -> UpdateResult:
+        """Execute a UTF-8 encoded SPARQL update. Returns (status_code, elapsed_ns)."""
         pass
 
+    def run_batch(self, body: bytes, headers: dict[str, str], is_update: bool, iterations: int) -> PackageRun:
+        """Execute a query (with headers) or an update N times. Runs them one after another by default."""
+        times = np.empty(iterations, dtype=np.int64)
+        offsets = np.empty(iterations, dtype=np.int64)
+        origin = time.perf_counter_ns()
+
+        successes = 0
+        if is_update:
+            for i in range(iterations):
+                offsets[i] = time.perf_counter_ns() - origin
+                status, times[i] = self.update(body)
+                successes += is_success(status)
+            return None, times, offsets, successes
+
+        send = self.compile_query(body, headers)
+        first_body = None
+        for i in range(iterations):
+            offsets[i] = time.perf_counter_ns() - origin
+            status, content, times[i] = send(i == 0)
+            successes += is_success(status)
+            if i == 0:
+                first_body = content
+
+        return first_body, times, offsets, successes
+
 
 class AsyncSPARQLPackage(ABC):
     """Base class for async SPARQL benchmark packages."""
@@ -55,12 +141,19 @@ class AsyncSPARQLPackage(ABC):
     async def teardown(self) -> None:
         pass
 
+    async def query(self, sparql: str, is_construct: bool = False) -> tuple[bytes, int]:
+        _, content, elapsed_ns = await self.query_prepared(*prepare_query(sparql, is_construct))
+        return content, elapsed_ns
+
+    async def query_prepared(self, body: bytes, headers: dict[str, str], capture_body: bool = True) -> QueryResult:
+        return await self.compile_query(body, headers)(capture_body)
+
     @abstractmethod
-    async def query(self, sparql: str, is_construct: bool = False) -> tuple[bytes, float]:
+    def compile_query(self, body: bytes, headers: dict[str, str]) -> AsyncCompiledQuery:
         pass
 
     @abstractmethod
-    async def update(self, sparql: str) -> float:
+    async def update(self, body: bytes) -> UpdateResult:
         pass
 
 
@@ -68,62 +161,81 @@ class HttpxSyncPackage(SPARQLPackage):
     name = "httpx_sync"
 
     def setup(self) -> None:
-        self.client = httpx.Client(timeout=TIMEOUT_TOTAL)
+        transport = httpx.HTTPTransport(http2=True, limits=HTTPX_LIMITS, retries=0)
+        self.client = httpx.Client(timeout=TIMEOUT_TOTAL, transport=transport)
         self.endpoint = get_sparql_endpoint()
 
     def teardown(self) -> None:
         self.client.close()
 
-    def query(self, sparql: str, is_construct: bool = False) -> tuple[bytes, float]:
-        headers = CONSTRUCT_HEADERS if is_construct else QUERY_HEADERS
-        start = time.perf_counter()
+    def compile_query(self, body: bytes, headers: dict[str, str]) -> CompiledQuery:
+        client = self.client
+        request = client.build_request("POST", self.endpoint, content=body, headers=headers)
+
+        def send(capture_body: bool) -> QueryResult:
+            start = time.perf_counter_ns()
+            response = client.send(request, stream=True)
+            try:
+                if capture_body:
+                    content = response.read()
+                else:
+                    content = None
+                    deque(response.iter_raw(), maxlen=0)
+            finally:
+                response.close()
+            return response.status_code, content, time.perf_counter_ns() - start
+
+        return send
+
+    def update(self, body: bytes) -> UpdateResult:
+        start = time.perf_counter_ns()
         response = self.client.post(
             self.endpoint,
-            data={"query": sparql},
-            headers=headers,
-        )
-        elapsed = time.perf_counter() - start
-        return response.content, elapsed
-
-    def update(self, sparql: str) -> float:
-        start = time.perf_counter()
-        self.client.post(
-            self.endpoint,
-            content=sparql,
+            content=body,
             headers=UPDATE_HEADERS,
         )
-        return time.perf_counter() - start
+        return response.status_code, time.perf_counter_ns() - start
 
 
 class HttpxAsyncPackage(AsyncSPARQLPackage):
     name = "httpx_async"
 
     async def setup(self) -> None:
-        self.client = httpx.AsyncClient(timeout=TIMEOUT_TOTAL)
+        transport = httpx.AsyncHTTPTransport(http2=True, limits=HTTPX_LIMITS, retries=0)
+        self.client = httpx.AsyncClient(timeout=TIMEOUT_TOTAL, transport=transport)
         self.endpoint = get_sparql_endpoint()
 
     async def teardown(self) -> None:
         await self.client.aclose()
 
-    async def query(self, sparql: str, is_construct: bool = False) -> tuple[bytes, float]:
-        headers = CONSTRUCT_HEADERS if is_construct else QUERY_HEADERS
-        start = time.perf_counter()
+    def compile_query(self, body: bytes, headers: dict[str, str]) -> AsyncCompiledQuery:
+        client = self.client
+        request = client.build_request("POST", self.endpoint, content=body, headers=headers)
+
+        async def send(capture_body: bool) -> QueryResult:
+            start = time.perf_counter_ns()
+            response = await client.send(request, stream=True)
+            try:
+                if capture_body:
+                    content = await response.aread()
+                else:
+                    content = None
+                    async for _ in response.aiter_raw():
+                        pass
+            finally:
+                await response.aclose()
+            return response.status_code, content, time.perf_counter_ns() - start
+
+        return send
+
+    async def update(self, body: bytes) -> UpdateResult:
+        start = time.perf_counter_ns()
         response = await self.client.post(
             self.endpoint,
-            data={"query": sparql},
-            headers=headers,
-        )
-        elapsed = time.perf_counter() - start
-        return response.content, elapsed
-
-    async def update(self, sparql: str) -> float:
-        start = time.perf_counter()
-        await self.client.post(
-            self.endpoint,
-            content=sparql,
+            content=body,
             headers=UPDATE_HEADERS,
         )
-        return time.perf_counter() - start
+        return response.status_code, time.perf_counter_ns() - start
 
 
 class AiohttpPackage(AsyncSPARQLPackage):
@@ -131,33 +243,45 @@ class AiohttpPackage(AsyncSPARQLPackage):
 
     async def setup(self) -> None:
         timeout = aiohttp.ClientTimeout(total=TIMEOUT_TOTAL)
-        self.session = aiohttp.ClientSession(timeout=timeout)
+        # aiodns-backed resolver with cached lookups; IPv4 only, so localhost skips the IPv6 attempt.
+        connector = aiohttp.TCPConnector(
+            limit=POOL_SIZE,
+            ttl_dns_cache=600,
+            resolver=aiohttp.AsyncResolver(),
+            family=socket.AF_INET,
+        )
+        self.session = aiohttp.ClientSession(timeout=timeout, connector=connector)
         self.endpoint = get_sparql_endpoint()
 
     async def teardown(self) -> None:
         await self.session.close()
 
-    async def query(self, sparql: str, is_construct: bool = False) -> tuple[bytes, float]:
-        headers = CONSTRUCT_HEADERS if is_construct else QUERY_HEADERS
-        start = time.perf_counter()
-        async with self.session.post(
-            self.endpoint,
-            data={"query": sparql},
-            headers=headers,
-        ) as response:
-            content = await response.read()
-        elapsed = time.perf_counter() - start
-        return content, elapsed
-
-    async def update(self, sparql: str) -> float:
-        start = time.perf_counter()
+    def compile_query(self, body: bytes, headers: dict[str, str]) -> AsyncCompiledQuery:
+        post = partial(self.session.post, self.endpoint, data=body, headers=headers)
+
+        async def send(capture_body: bool) -> QueryResult:
+            start = time.perf_counter_ns()
+            async with post() as response:
+                # Drain instead of release(): an unread payload closes the connection.
+                if capture_body:
+                    content = await response.read()
+                else:
+                    content = None
+                    async for _ in response.content.iter_any():
+                        pass
+            return response.status, content, time.perf_counter_ns() - start
+
+        return send
+
+    async def update(self, body: bytes) -> UpdateResult:
+        start = time.perf_counter_ns()
         async with self.session.post(
             self.endpoint,
-            data=sparql,
+            data=body,
             headers=UPDATE_HEADERS,
         ) as response:
             await response.read()
-        return time.perf_counter() - start
+        return response.status, time.perf_counter_ns() - start
 
 
 class RequestsPackage(SPARQLPackage):
@@ -165,148 +289,267 @@ class RequestsPackage(SPARQLPackage):
 
     def setup(self) -> None:
         self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         self.endpoint = get_sparql_endpoint()
         self.timeout = (TIMEOUT_CONNECT, TIMEOUT_READ)
 
     def teardown(self) -> None:
         self.session.close()
 
-    def query(self, sparql: str, is_construct: bool = False) -> tuple[bytes, float]:
-        headers = CONSTRUCT_HEADERS if is_construct else QUERY_HEADERS
-        start = time.perf_counter()
-        response = self.session.post(
-            self.endpoint,
-            data={"query": sparql},
-            headers=headers,
-            timeout=self.timeout,
+    def compile_query(self, body: bytes, headers: dict[str, str]) -> CompiledQuery:
+        session = self.session
+        timeout = self.timeout
+        prepared = session.prepare_request(
+            requests.Request("POST", self.endpoint, data=body, headers=headers)
         )
-        elapsed = time.perf_counter() - start
-        return response.content, elapsed
 
-    def update(self, sparql: str) -> float:
-        start = time.perf_counter()
-        self.session.post(
+        def send(capture_body: bool) -> QueryResult:
+            start = time.perf_counter_ns()
+            response = session.send(prepared, timeout=timeout, stream=not capture_body)
+            if capture_body:
+                content = response.content
+            else:
+                content = None
+                deque(response.iter_content(chunk_size=65536), maxlen=0)
+                response.close()
+            return response.status_code, content, time.perf_counter_ns() - start
+
+        return send
+
+    def update(self, body: bytes) -> UpdateResult:
+        start = time.perf_counter_ns()
+        response = self.session.post(
             self.endpoint,
-            data=sparql,
+            data=body,
             headers=UPDATE_HEADERS,
             timeout=self.timeout,
         )
-        return time.perf_counter() - start
+        return response.status_code, time.perf_counter_ns() - start
 
 
 class Urllib3Package(SPARQLPackage):
     name = "urllib3"
 
     def setup(self) -> None:
-        self.http = urllib3.PoolManager()
+        self.http = urllib3.PoolManager(num_pools=1, maxsize=POOL_SIZE, block=False)
         self.endpoint = get_sparql_endpoint()
         self.timeout = urllib3.Timeout(connect=TIMEOUT_CONNECT, read=TIMEOUT_READ)
 
     def teardown(self) -> None:
         self.http.clear()
 
-    def query(self, sparql: str, is_construct: bool = False) -> tuple[bytes, float]:
-        headers = CONSTRUCT_HEADERS if is_construct else QUERY_HEADERS
-        start = time.perf_counter()
-        response = self.http.request(
+    def compile_query(self, body: bytes, headers: dict[str, str]) -> CompiledQuery:
+        urlopen = partial(
+            self.http.urlopen,
             "POST",
             self.endpoint,
-            fields={"query": sparql},
+            body=body,
             headers=headers,
             timeout=self.timeout,
         )
-        elapsed = time.perf_counter() - start
-        return response.data, elapsed
 
-    def update(self, sparql: str) -> float:
-        start = time.perf_counter()
-        self.http.request(
+        def send(capture_body: bool) -> QueryResult:
+            start = time.perf_counter_ns()
+            response = urlopen(preload_content=capture_body)
+            if capture_body:
+                content = response.data
+            else:
+                content = None
+                response.drain_conn()
+                response.release_conn()
+            return response.status, content, time.perf_counter_ns() - start
+
+        return send
+
+    def update(self, body: bytes) -> UpdateResult:
+        start = time.perf_counter_ns()
+        response = self.http.request(
             "POST",
             self.endpoint,
-            body=sparql.encode(),
+            body=body,
             headers=UPDATE_HEADERS,
             timeout=self.timeout,
         )
-        return time.perf_counter() - start
+        return response.status, time.perf_counter_ns() - start
 
 
 class PycurlPackage(SPARQLPackage):
     name = "pycurl"
 
     def setup(self) -> None:
-        self.curl = pycurl.Curl()
         self.endpoint = get_sparql_endpoint()
-        self.curl.setopt(pycurl.TIMEOUT, int(TIMEOUT_TOTAL))
-        self.curl.setopt(pycurl.CONNECTTIMEOUT, int(TIMEOUT_CONNECT))
+        self.curl = self._new_handle()
+
+    def _new_handle(self) -> pycurl.Curl:
+        curl = pycurl.Curl()
+        curl.setopt(pycurl.TIMEOUT, int(TIMEOUT_TOTAL))
+        curl.setopt(pycurl.CONNECTTIMEOUT, int(TIMEOUT_CONNECT))
+        curl.setopt(pycurl.URL, self.endpoint)
+        curl.setopt(pycurl.POST, 1)
+        curl.setopt(pycurl.FORBID_REUSE, 0)
+        curl.setopt(pycurl.FRESH_CONNECT, 0)
+        return curl
 
     def teardown(self) -> None:
         self.curl.close()
 
-    def query(self, sparql: str, is_construct: bool = False) -> tuple[bytes, float]:
-        buffer = BytesIO()
-        accept = "text/turtle" if is_construct else "application/sparql-results+json"
+    def compile_query(self, body: bytes, headers: dict[str, str]) -> CompiledQuery:
+        curl = self.curl
+        curl.setopt(pycurl.POSTFIELDS, body)
+        curl.setopt(pycurl.HTTPHEADER, [f"{key}: {value}" for key, value in headers.items()])
 
-        self.curl.setopt(pycurl.URL, self.endpoint)
-        self.curl.setopt(pycurl.POST, 1)
-        self.curl.setopt(pycurl.POSTFIELDS, f"query={sparql}")
-        self.curl.setopt(pycurl.HTTPHEADER, [f"Accept: {accept}"])
-        self.curl.setopt(pycurl.WRITEDATA, buffer)
+        def send(capture_body: bool) -> QueryResult:
+            buffer = BytesIO() if capture_body else None
+            if buffer is not None:
+                curl.setopt(pycurl.WRITEDATA, buffer)
+            else:
+                curl.setopt(pycurl.WRITEFUNCTION, _discard_chunk)
 
-        start = time.perf_counter()
-        self.curl.perform()
-        elapsed = time.perf_counter() - start
+            start = time.perf_counter_ns()
+            curl.perform()
+            elapsed_ns = time.perf_counter_ns() - start
 
-        return buffer.getvalue(), elapsed
+            status = curl.getinfo(pycurl.RESPONSE_CODE)
+            return status, buffer.getvalue() if buffer is not None else None, elapsed_ns
 
-    def update(self, sparql: str) -> float:
+        return send
+
+    def update(self, body: bytes) -> UpdateResult:
         buffer = BytesIO()
 
-        self.curl.setopt(pycurl.URL, self.endpoint)
-        self.curl.setopt(pycurl.POST, 1)
-        self.curl.setopt(pycurl.POSTFIELDS, sparql)
-        self.curl.setopt(pycurl.HTTPHEADER, ["Content-Type: application/sparql-update"])
+        self.curl.setopt(pycurl.POSTFIELDS, body)
+        self.curl.setopt(pycurl.HTTPHEADER, [f"{key}: {value}" for key, value in UPDATE_HEADERS.items()])
         self.curl.setopt(pycurl.WRITEDATA, buffer)
 
-        start = time.perf_counter()
+        start = time.perf_counter_ns()
         self.curl.perform()
-        return time.perf_counter() - start
-
+        elapsed_ns = time.perf_counter_ns() - start
+        return self.curl.getinfo(pycurl.RESPONSE_CODE), elapsed_ns
 
-SYNC_PACKAGES = [HttpxSyncPackage, RequestsPackage, Urllib3Package, PycurlPackage]
-ASYNC_PACKAGES = [HttpxAsyncPackage, AiohttpPackage]
 
+class PycurlMultiPackage(PycurlPackage):
+    """pycurl driving up to CURL_MULTI_HANDLES parallel requests through CurlMulti."""
 
-def run_sync_package(package_class: type[SPARQLPackage], sparql: str, is_construct: bool = False, is_update: bool = False, iterations: int = 50) -> list[tuple[bytes | None, float]]:
-    """Run a sync package for N iterations."""
-    package = package_class()
-    package.setup()
-    results = []
+    name = "pycurl_multi"
 
-    for _ in range(iterations):
-        if is_update:
-            elapsed = package.update(sparql)
-            results.append((None, elapsed))
-        else:
-            content, elapsed = package.query(sparql, is_construct)
-            results.append((content, elapsed))
+    def setup(self) -> None:
+        super().setup()
+        self.handles = [self._new_handle() for _ in range(CURL_MULTI_HANDLES)]
+        self.multi = pycurl.CurlMulti()
 
-    package.teardown()
-    return results
+    def teardown(self) -> None:
+        for curl in self.handles:
+            curl.close()
+        self.multi.close()
+        super().teardown()
 
+    def run_batch(self, body: bytes, headers: dict[str, str], is_update: bool, iterations: int) -> PackageRun:
+        """Execute a query or an update N times in parallel."""
+        if is_update:
+            _, times, offsets, successes = self._perform_batch(
+                body, [f"{key}: {value}" for key, value in UPDATE_HEADERS.items()], iterations
+            )
+            return None, times, offsets, successes
+        return self._perform_batch(body, [f"{key}: {value}" for key, value in headers.items()], iterations)
+
+    def _perform_batch(self, postfields: bytes, httpheader: list[str], iterations: int) -> PackageRun:
+        for curl in self.handles:
+            curl.setopt(pycurl.POSTFIELDS, postfields)
+            curl.setopt(pycurl.HTTPHEADER, httpheader)
+
+        free = list(self.handles)
+        in_flight: dict[pycurl.Curl, tuple[int, BytesIO | None, int]] = {}
+        times = np.empty(iterations, dtype=np.int64)
+        offsets = np.empty(iterations, dtype=np.int64)
+        content = None
+        successes = 0
+        submitted = 0
+        origin = time.perf_counter_ns()
+
+        while submitted < iterations or in_flight:
+            while free and submitted < iterations:
+                curl = free.pop()
+                # Only the first response body is kept; the rest are dropped as they arrive.
+                buffer = BytesIO() if submitted == 0 else None
+                if buffer is not None:
+                    curl.setopt(pycurl.WRITEDATA, buffer)
+                else:
+                    curl.setopt(pycurl.WRITEFUNCTION, _discard_chunk)
+                in_flight[curl] = (submitted, buffer, time.perf_counter_ns())
+                self.multi.add_handle(curl)
+                submitted += 1
+
+            while self.multi.perform()[0] == pycurl.E_CALL_MULTI_PERFORM:
+                pass
+
+            finished = []
+            while True:
+                queued, done, failed = self.multi.info_read()
+                finished.extend(done)
+                finished.extend(curl for curl, _, _ in failed)
+                successes += sum(is_success(curl.getinfo(pycurl.RESPONSE_CODE)) for curl in done)
+                if not queued:
+                    break
+
+            end = time.perf_counter_ns()
+            for curl in finished:
+                self.multi.remove_handle(curl)
+                index, buffer, start = in_flight.pop(curl)
+                times[index] = end - start
+                offsets[index] = start - origin
+                if buffer is not None:
+                    content = buffer.getvalue()
+                free.append(curl)
+
+            if in_flight and not finished:
+                self.multi.select(1.0)
+
+        return content, times, offsets, successes
+
+
+SYNC_PACKAGES = [HttpxSyncPackage, RequestsPackage, Urllib3Package, PycurlPackage, PycurlMultiPackage]
+ASYNC_PACKAGES = [HttpxAsyncPackage, AiohttpPackage]
 
-async def run_async_package(package_class: type[AsyncSPARQLPackage], sparql: str, is_construct: bool = False, is_update: bool = False, iterations: int = 50) -> list[tuple[bytes | None, float]]:
-    """Run an async package for N iterations."""
-    package = package_class()
-    await package.setup()
-    results = []
 
-    for _ in range(iterations):
-        if is_update:
-            elapsed = await package.update(sparql)
-            results.append((None, elapsed))
-        else:
-            content, elapsed = await package.query(sparql, is_construct)
-            results.append((content, elapsed))
-
-    await package.teardown()
-    return results
+def run_sync_package(package: SPARQLPackage, body: bytes, is_construct: bool = False, is_update: bool = False, iterations: int = 50) -> PackageRun:
+    """Run an already set up sync package for N iterations.
+
+    `body` is the pre-encoded form body for queries, or the UTF-8 SPARQL for updates.
+    """
+    headers = FORM_CONSTRUCT_HEADERS if is_construct else FORM_QUERY_HEADERS
+    return package.run_batch(body, headers, is_update, iterations)
+
+
+async def run_async_package(package: AsyncSPARQLPackage, body: bytes, is_construct: bool = False, is_update: bool = False, iterations: int = 50, concurrency: int | None = None) -> PackageRun:
+    """Run an already set up async package for N concurrent iterations, at most `concurrency` in flight."""
+    headers = FORM_CONSTRUCT_HEADERS if is_construct else FORM_QUERY_HEADERS
+    semaphore = asyncio.Semaphore(concurrency or iterations)
+    times = np.empty(iterations, dtype=np.int64)
+    offsets = np.empty(iterations, dtype=np.int64)
+    first_body = None
+    origin = time.perf_counter_ns()
+
+    async def run_update(i: int) -> bool:
+        async with semaphore:
+            offsets[i] = time.perf_counter_ns() - origin
+            status, times[i] = await package.update(body)
+        return is_success(status)
+
+    async def run_query(i: int) -> bool:
+        nonlocal first_body
+        async with semaphore:
+            offsets[i] = time.perf_counter_ns() - origin
+            status, content, times[i] = await send(i == 0)
+        if i == 0:
+            first_body = content
+        return is_success(status)
+
+    if is_update:
+        successes = await asyncio.gather(*(run_update(i) for i in range(iterations)))
+        return None, times, offsets, sum(successes)
+
+    send = package.compile_query(body, headers)
+    successes = await asyncio.gather(*(run_query(i) for i in range(iterations)))
+    return first_body, times, offsets, sum(successes)
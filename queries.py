@@ -1,3 +1,5 @@
+from urllib.parse import urlencode
+
 BASE = "http://example.org/"
 GRAPH = "http://example.org/benchmark"
 
@@ -38,6 +40,8 @@ QUERIES = {
     },
 }
 
+# Individual updates measure per-operation latency; "updates_batch" sends all
+# three in one SPARQL 1.1 Update request to measure update pipeline throughput.
 UPDATES = {
     "insert_data": {
         "operation": "INSERT",
@@ -78,3 +82,17 @@ UPDATES = {
         """,
     },
 }
+
+UPDATES["updates_batch"] = {
+    "operation": "BATCH",
+    "sparql": " ;\n".join(
+        UPDATES[name]["sparql"].strip() for name in ("insert_data", "delete_data", "update")
+    ),
+}
+
+# Pre-encoded request bodies, so clients do not re-encode them on every request.
+for _entry in (*QUERIES.values(), *UPDATES.values()):
+    _entry["sparql_bytes"] = _entry["sparql"].encode("utf-8")
+for _entry in QUERIES.values():
+    _entry["form_body"] = urlencode({"query": _entry["sparql"]}).encode("utf-8")
+del _entry
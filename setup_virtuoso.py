@@ -1,3 +1,4 @@
+import os
 import sys
 import time
 
@@ -13,6 +14,9 @@ CONTAINER_NAME = "sparql-benchmark"
 HTTP_PORT = 8090
 ISQL_PORT = 1011
 MEMORY = "4g"
+STUB_PORT = 8091
+# When set, get_sparql_endpoint() points at the stub server (inherited by worker processes).
+USE_STUB_ENV = "SPARQL_BENCHMARK_USE_STUB"
 
 
 def setup_virtuoso() -> None:
@@ -57,10 +61,17 @@ def stop_virtuoso() -> None:
 
 
 def get_sparql_endpoint() -> str:
-    """Return the SPARQL endpoint URL."""
+    """Return the SPARQL endpoint URL, or the stub endpoint when USE_STUB_ENV is set."""
+    if os.environ.get(USE_STUB_ENV):
+        return get_stub_endpoint()
     return f"http://localhost:{HTTP_PORT}/sparql"
 
 
+def get_stub_endpoint() -> str:
+    """Return the stub SPARQL endpoint URL."""
+    return f"http://localhost:{STUB_PORT}/sparql"
+
+
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "stop":
         stop_virtuoso()
@@ -0,0 +1,78 @@
+import multiprocessing
+import time
+
+import httpx
+from aiohttp import web
+
+from factory import FORM_CONSTRUCT_HEADERS, FORM_QUERY_HEADERS
+from queries import QUERIES
+from setup_virtuoso import STUB_PORT, get_stub_endpoint
+
+# Maps a pre-encoded query form body to its cached (response_body, content_type).
+CachedResponses = dict[bytes, tuple[bytes, str]]
+
+
+def capture_responses(endpoint: str) -> CachedResponses:
+    """Fetch the real response of every benchmark query once from the SPARQL endpoint."""
+    responses = {}
+
+    with httpx.Client(timeout=60.0) as client:
+        for query_info in QUERIES.values():
+            is_construct = query_info["operation"] == "CONSTRUCT"
+            response = client.post(
+                endpoint,
+                content=query_info["form_body"],
+                headers=FORM_CONSTRUCT_HEADERS if is_construct else FORM_QUERY_HEADERS,
+            )
+            response.raise_for_status()
+            responses[query_info["form_body"]] = (response.content, response.headers["Content-Type"])
+
+    return responses
+
+
+def _make_app(responses: CachedResponses) -> web.Application:
+    """Build an app answering known queries from cache and everything else with an empty 200."""
+
+    async def handle_post(request: web.Request) -> web.Response:
+        cached = responses.get(await request.read())
+        if cached is None:
+            return web.Response()
+        content, content_type = cached
+        return web.Response(body=content, headers={"Content-Type": content_type})
+
+    async def handle_get(request: web.Request) -> web.Response:
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_post("/sparql", handle_post)
+    app.router.add_get("/sparql", handle_get)
+    return app
+
+
+def _serve(responses: CachedResponses) -> None:
+    web.run_app(_make_app(responses), host="localhost", port=STUB_PORT, print=None)
+
+
+def start_stub(responses: CachedResponses, timeout: int = 10) -> multiprocessing.Process:
+    """Start the stub endpoint in a separate process and wait until it answers."""
+    process = multiprocessing.Process(target=_serve, args=(responses,), daemon=True)
+    process.start()
+    endpoint = get_stub_endpoint()
+    start = time.time()
+
+    while time.time() - start < timeout:
+        try:
+            if httpx.get(endpoint, timeout=1.0).status_code == 200:
+                return process
+        except httpx.RequestError:
+            pass
+        time.sleep(0.1)
+
+    process.terminate()
+    raise RuntimeError("Stub SPARQL endpoint readiness check timed out.")
+
+
+def stop_stub(process: multiprocessing.Process) -> None:
+    """Stop the stub endpoint process."""
+    process.terminate()
+    process.join()
@@ -1,32 +1,163 @@
+import functools
+import os
+import platform
+import sys
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from io import StringIO
+
 BASE = "http://example.org/"
 GRAPH = "http://example.org/benchmark"
 RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
 RDFS_LABEL = "http://www.w3.org/2000/01/rdf-schema#label"
 XSD_INTEGER = "http://www.w3.org/2001/XMLSchema#integer"
 
+# Bracketed IRI fragments, formatted and interned once at import instead of per triple.
+_ENTITY = sys.intern(f"<{BASE}entity/")
+_P_TYPE = sys.intern(f"> <{RDF_TYPE}> <{BASE}Entity> .")
+_P_LABEL = sys.intern(f'> <{RDFS_LABEL}> "Entity ')
+_P_VALUE = sys.intern(f'> <{BASE}value> "')
+_XSD_INT_SUFFIX = sys.intern(f'"^^<{XSD_INTEGER}> .')
+_P_CATEGORY = sys.intern(f"> <{BASE}category> <{BASE}category/")
+_P_RELATED = sys.intern(f"> <{BASE}relatedTo> <{BASE}entity/")
+# Category triple tails, indexed by i % 10.
+_CATEGORY_TAILS = tuple(sys.intern(f"{_P_CATEGORY}{k}> .") for k in range(10))
+
+# Above this size the compiled byte writer beats the interpreted loop.
+NUMBA_MIN_ENTITIES = 100_000
+
+
+def _write_triples(buf: StringIO, num_entities: int, start: int = 0, sep: str = "\n") -> None:
+    """Write sep-separated triples for test data into buf."""
+    if num_entities <= 0:
+        return
+    write = buf.write
+
+    # The first entity is peeled so the loop needs neither a separator flag nor an i > 0 check.
+    prev = str(start)
+    subject = _ENTITY + prev
+    write(subject + _P_TYPE + sep)
+    write(subject + _P_LABEL + prev + '" .' + sep)
+    write(subject + _P_VALUE + prev + _XSD_INT_SUFFIX + sep)
+    write(subject + _CATEGORY_TAILS[start % 10])
+    if start > 0:
+        write(sep + subject + _P_RELATED + str(start - 1) + "> .")
+
+    _entity_loop(sep)(write, start + 1, start + num_entities, prev)
+
+
+def _fstring_literal(text: str) -> str:
+    """Escape text for use as the literal part of a generated f-string."""
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+@functools.cache
+def _entity_loop(sep: str) -> Callable[..., None]:
+    """Compile the entity loop of _write_triples with sep and the IRI fragments baked in as literals.
+
+    The category triple still comes from _CATEGORY_TAILS, exposed to the generated code as `tails`.
+    """
+    entity = _fstring_literal(sep + _ENTITY)
+    template = (
+        f"{entity}{{si}}{_fstring_literal(_P_TYPE)}"
+        f'{entity}{{si}}{_fstring_literal(_P_LABEL)}{{si}}" .'
+        f"{entity}{{si}}{_fstring_literal(_P_VALUE)}{{si}}{_fstring_literal(_XSD_INT_SUFFIX)}"
+        f"{entity}{{si}}{{tails[i % 10]}}"
+        f"{entity}{{si}}{_fstring_literal(_P_RELATED)}{{prev}}> ."
+    )
+    source = (
+        "def entity_loop(write, start, stop, prev):\n"
+        "    for i in range(start, stop):\n"
+        "        si = str(i)\n"
+        f"        write(f{template!r})\n"
+        "        prev = si\n"
+    )
+    namespace: dict[str, object] = {"tails": _CATEGORY_TAILS}
+    exec(compile(source, f"<test_data entity loop sep={sep!r}>", "exec"), namespace)
+    return namespace["entity_loop"]
 
-def _generate_triples(num_entities: int, start: int = 0) -> list[str]:
-    """Generate triples for test data."""
-    triples = []
 
-    for i in range(start, start + num_entities):
-        subject = f"<{BASE}entity/{i}>"
-        triples.append(f"{subject} <{RDF_TYPE}> <{BASE}Entity> .")
-        triples.append(f'{subject} <{RDFS_LABEL}> "Entity {i}" .')
-        triples.append(f'{subject} <{BASE}value> "{i}"^^<{XSD_INTEGER}> .')
-        triples.append(f"{subject} <{BASE}category> <{BASE}category/{i % 10}> .")
-        if i > 0:
-            triples.append(f"{subject} <{BASE}relatedTo> <{BASE}entity/{i - 1}> .")
+@functools.cache
+def _compiled_writer() -> Callable[[int, int, str], bytes] | None:
+    """Return the Numba byte writer, or None on interpreters other than CPython or without Numba."""
+    # PyPy runs the plain loop faster than it runs NumPy/Numba through cpyext, so only CPython loads them.
+    if platform.python_implementation() != "CPython":
+        return None
+    try:
+        from _test_data_jit import triples_bytes
+    except ImportError:
+        return None
+    return triples_bytes
 
-    return triples
 
+def _large_batch_writer(num_entities: int) -> Callable[[int, int, str], bytes] | None:
+    """Return the compiled writer when num_entities is large enough to benefit from it."""
+    return _compiled_writer() if num_entities >= NUMBA_MIN_ENTITIES else None
 
+
+def _write_test_triples(buf: StringIO, num_entities: int, start: int = 0, sep: str = "\n") -> None:
+    """Write test triples into buf, using the compiled writer for large batches when available."""
+    compiled = _large_batch_writer(num_entities)
+    if compiled is not None:
+        buf.write(compiled(num_entities, start, sep).decode("ascii"))
+    else:
+        _write_triples(buf, num_entities, start, sep)
+
+
+# Payloads are immutable, so repeated calls share one cached object; use .cache_clear() to free them.
+@functools.lru_cache(maxsize=32)
 def generate_test_data(num_entities: int = 1000, start: int = 0) -> str:
     """Generate N-Triples format test data."""
-    return "\n".join(_generate_triples(num_entities, start))
+    buf = StringIO()
+    _write_test_triples(buf, num_entities, start)
+    return buf.getvalue()
+
+
+def _test_data_bytes(num_entities: int, start: int = 0) -> bytes:
+    """Uncached body of generate_test_data_bytes, also the worker entry point of generate_test_data_parallel."""
+    compiled = _large_batch_writer(num_entities)
+    if compiled is not None:
+        return compiled(num_entities, start)
+    buf = StringIO()
+    _write_triples(buf, num_entities, start)
+    return buf.getvalue().encode("ascii")
+
+
+@functools.lru_cache(maxsize=32)
+def generate_test_data_bytes(num_entities: int = 1000, start: int = 0) -> bytes:
+    """Generate N-Triples format test data as ASCII bytes, ready to send as a request body."""
+    return _test_data_bytes(num_entities, start)
+
+
+def generate_test_data_parallel(num_entities: int, start: int = 0, workers: int | None = None) -> bytes:
+    """Generate the same bytes as generate_test_data_bytes, splitting the range across worker processes."""
+    workers = min(workers or os.cpu_count() or 1, max(num_entities, 1))
+    bounds = [start + num_entities * k // workers for k in range(workers + 1)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunks = executor.map(_test_data_bytes, [b - a for a, b in zip(bounds, bounds[1:])], bounds[:-1])
+        return b"\n".join(chunk for chunk in chunks if chunk)
+
+
+def iter_nt_chunks(num_entities: int, start: int = 0, chunk_entities: int = 10_000) -> Iterator[str]:
+    """Yield N-Triples test data in chunks of chunk_entities entities that concatenate to generate_test_data()."""
+    end = start + num_entities
+    for chunk_start in range(start, end, chunk_entities):
+        buf = StringIO()
+        if chunk_start > start:
+            buf.write("\n")
+        _write_test_triples(buf, min(chunk_entities, end - chunk_start), chunk_start)
+        yield buf.getvalue()
 
 
-def generate_insert_sparql(num_entities: int = 1000, start: int = 0) -> str:
-    """Generate SPARQL INSERT DATA query for test data."""
-    triples = " ".join(_generate_triples(num_entities, start))
-    return f"INSERT DATA {{ GRAPH <{GRAPH}> {{ {triples} }} }}"
+@functools.lru_cache(maxsize=32)
+def generate_insert_sparql(num_entities: int = 1000, start: int = 0, graph: str | None = GRAPH) -> str:
+    """Generate SPARQL INSERT DATA query for test data, into graph or the default graph if None."""
+    if graph is None:
+        opening, closing = "INSERT DATA { ", " }"
+    else:
+        opening, closing = f"INSERT DATA {{ GRAPH <{graph}> {{ ", " } }"
+    buf = StringIO()
+    buf.write(opening)
+    _write_test_triples(buf, num_entities, start, " ")
+    buf.write(closing)
+    return buf.getvalue()